@@ -1,2 +1,4 @@
+from .lineups import expand_lineup_slots, optimize_lineups
+from .store import query_store
 from .transforms import sigmoid
-from .utils import load_result
+from .utils import load_result, write_result
@@ -0,0 +1,120 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# ESPN's lineup slot ids, as used in `eligibleSlots` and `lineupSlotCounts`.
+ESPN_LINEUP_SLOTS = {
+    0: 'PG',
+    1: 'SG',
+    2: 'SF',
+    3: 'PF',
+    4: 'C',
+    5: 'G',
+    6: 'F',
+    7: 'SG/SF',
+    8: 'G/F',
+    9: 'PF/C',
+    10: 'F/C',
+    11: 'UT',
+    12: 'BE',
+    13: 'IR',
+}
+BENCH_SLOTS = ('BE', 'IR')
+DEFAULT_LINEUP_SLOT_COUNTS = {'PG': 1, 'SG': 1, 'SF': 1, 'PF': 1, 'C': 1, 'G': 1, 'F': 1, 'UT': 3}
+# Standard 9-category scoring; turnovers count against a lineup.
+DEFAULT_LINEUP_CATEGORY_WEIGHTS = {
+    'FG%': 1.0,
+    'FT%': 1.0,
+    '3PTM': 1.0,
+    'REB': 1.0,
+    'AST': 1.0,
+    'STL': 1.0,
+    'BLK': 1.0,
+    'TO': -1.0,
+    'PTS': 1.0,
+}
+
+
+def expand_lineup_slots(slot_counts: Dict[str, int]) -> List[str]:
+    """Expands lineup slot counts into one entry per starting slot, e.g. {'UT': 2} -> ['UT', 'UT'].
+
+    Args:
+        slot_counts (Dict[str, int]): number of starting slots for each slot name
+
+    Returns:
+        List[str]: slot name for every starting slot
+    """
+    return [
+        slot
+        for slot, count in slot_counts.items()
+        if slot not in BENCH_SLOTS
+        for _ in range(count)
+    ]
+
+
+def optimize_lineups(
+    values: np.ndarray, eligibility: np.ndarray, fill_slots: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exactly solves the starting lineup assignment problem for a batch of rosters.
+
+    Runs a DP over players whose state is the set of filled starting slots, so the cost is
+    O(players * slots * 2 ** slots) per lineup, vectorized over all leading (e.g. team and day)
+    dimensions at once.
+
+    Args:
+        values (np.ndarray): value of starting each player, of shape (..., num_players). NaN marks
+            a player who can't be started (e.g. no game that day, or roster padding).
+        eligibility (np.ndarray): boolean array of shape (..., num_players, num_slots) marking
+            which starting slots each player can fill
+        fill_slots (bool): if True, first maximize the number of filled slots and only then the
+            total value, so negatively valued players still start over empty slots. Defaults to
+            True.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]:
+            * the slot index assigned to each player, of shape (..., num_players), -1 if benched
+            * the total value of each optimal lineup, of shape (...)
+    """
+    batch_shape, num_players = values.shape[:-1], values.shape[-1]
+    num_slots = eligibility.shape[-1]
+    num_lineups = int(np.prod(batch_shape, dtype=int))
+    values = values.reshape((num_lineups, num_players)).astype(float)
+    eligibility = eligibility.reshape((num_lineups, num_players, num_slots)).astype(bool)
+    playable = eligibility & ~np.isnan(values)[..., None]
+    values = np.nan_to_num(values)
+
+    masks = np.arange(1 << num_slots)
+    open_masks = [masks[(masks >> slot) & 1 == 0] for slot in range(num_slots)]
+    best = np.full((num_lineups, 1 << num_slots), -np.inf)
+    best[:, 0] = 0.0
+    choices = np.full((num_players, num_lineups, 1 << num_slots), -1, dtype=np.int8)
+    for player in range(num_players):
+        # Benching the player carries every state over unchanged.
+        next_best = best.copy()
+        for slot in range(num_slots):
+            source, target = open_masks[slot], open_masks[slot] | (1 << slot)
+            candidate = best[:, source] + np.where(
+                playable[:, player, slot], values[:, player], -np.inf
+            )[:, None]
+            improved = candidate > next_best[:, target]
+            next_best[:, target] = np.where(improved, candidate, next_best[:, target])
+            choices[player][:, target] = np.where(improved, slot, choices[player][:, target])
+        best = next_best
+
+    if fill_slots:
+        filled = np.array([bin(mask).count('1') for mask in masks])
+        num_filled = np.where(np.isfinite(best), filled, -1)
+        best = np.where(num_filled == num_filled.max(axis=1, keepdims=True), best, -np.inf)
+    lineup_index = np.arange(num_lineups)
+    state = best.argmax(axis=1)
+    totals = best[lineup_index, state]
+
+    assignments = np.full((num_lineups, num_players), -1, dtype=int)
+    for player in reversed(range(num_players)):
+        slot = choices[player, lineup_index, state].astype(int)
+        assignments[:, player] = slot
+        state = np.where(slot >= 0, state ^ (1 << np.maximum(slot, 0)), state)
+    return (
+        assignments.reshape(batch_shape + (num_players,)),
+        totals.reshape(batch_shape),
+    )
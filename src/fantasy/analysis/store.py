@@ -0,0 +1,180 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+
+# Columns to index for every exported table, keyed by table name. Every index leads with `date`,
+# which the per-date replacement in `write_tables` and most queries filter on.
+TABLE_INDEXES = {
+    'player_statistics': [('date', 'player'), ('date', 'period', 'category')],
+    'normalized_player_statistics': [('date', 'player'), ('date', 'period', 'category')],
+    'player_eligibility': [('date', 'player')],
+    'roster_statistics': [('date', 'team'), ('date', 'period', 'category')],
+    'normalized_roster_statistics': [('date', 'team'), ('date', 'period', 'category')],
+    'team_rosters': [('date', 'player'), ('date', 'team')],
+    'team_roster_relevances': [('date', 'player'), ('date', 'team'), ('date', 'period')],
+    'trade_relevances': [
+        ('date', 'player'),
+        ('date', 'team'),
+        ('date', 'player_team'),
+        ('date', 'period'),
+    ],
+    'optimal_lineups': [('date', 'player'), ('date', 'team')],
+}
+
+
+def _to_long(frame: pd.DataFrame, index_names: List[str], column_name: str) -> pd.DataFrame:
+    long_frame = frame.stack().rename('value').reset_index()
+    long_frame.columns = index_names + [column_name, 'value']
+    long_frame['value'] = pd.to_numeric(long_frame['value'], errors='coerce')
+    return long_frame
+
+
+def to_long_tables(
+    player_statistics: Optional[pd.DataFrame] = None,
+    normalized_player_statistics: Optional[pd.DataFrame] = None,
+    player_eligibility: Optional[Dict[str, List[str]]] = None,
+    roster_statistics: Optional[pd.DataFrame] = None,
+    normalized_roster_statistics: Optional[pd.DataFrame] = None,
+    team_rosters: Optional[Dict[str, List[str]]] = None,
+    team_roster_relevances: Optional[pd.DataFrame] = None,
+    trade_relevances: Optional[pd.DataFrame] = None,
+    optimal_lineups: Optional[pd.DataFrame] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Converts flow artifacts into long-format tables (one row per value) for export.
+
+    Args:
+        player_statistics (pd.DataFrame): player statistics, indexed by (player, category)
+        normalized_player_statistics (pd.DataFrame): z-scores, indexed by (category, player)
+        player_eligibility (Dict[str, List[str]]): mapping from player name to eligible slots
+        roster_statistics (pd.DataFrame): roster statistics, indexed by (team, category)
+        normalized_roster_statistics (pd.DataFrame): z-scores, indexed by (period, category)
+        team_rosters (Dict[str, List[str]]): mapping from roster name to roster
+        team_roster_relevances (pd.DataFrame): relevances, indexed by (team, player)
+        trade_relevances (pd.DataFrame): relevances, indexed by (team, other team, player). Its
+            table has a `player_team` column naming which of the two teams the player is on (they
+            are scored against the other one), which needs `team_rosters`.
+        optimal_lineups (pd.DataFrame): lineups, indexed by (team, day, player)
+
+    Returns:
+        Dict[str, pd.DataFrame]: long-format tables keyed by table name, for the artifacts given
+    """
+    tables = {}
+    if player_statistics is not None:
+        tables['player_statistics'] = _to_long(
+            player_statistics, ['player', 'category'], 'period'
+        )
+    if normalized_player_statistics is not None:
+        tables['normalized_player_statistics'] = _to_long(
+            normalized_player_statistics, ['category', 'player'], 'period'
+        )
+    if player_eligibility is not None:
+        tables['player_eligibility'] = pd.DataFrame(
+            [(player, slot) for player, slots in player_eligibility.items() for slot in slots],
+            columns=['player', 'slot'],
+        )
+    if roster_statistics is not None:
+        tables['roster_statistics'] = _to_long(roster_statistics, ['team', 'category'], 'period')
+    if normalized_roster_statistics is not None:
+        tables['normalized_roster_statistics'] = _to_long(
+            normalized_roster_statistics, ['period', 'category'], 'team'
+        )
+    if team_rosters is not None:
+        tables['team_rosters'] = pd.DataFrame(
+            [(team, player) for team, roster in team_rosters.items() for player in roster],
+            columns=['team', 'player'],
+        )
+    if team_roster_relevances is not None:
+        tables['team_roster_relevances'] = _to_long(
+            team_roster_relevances, ['team', 'player'], 'period'
+        )
+    if trade_relevances is not None:
+        assert team_rosters is not None, 'Team rosters are needed to export trade relevances.'
+        player_teams = {player: team for team, roster in team_rosters.items() for player in roster}
+        trade_table = _to_long(trade_relevances, ['team', 'other_team', 'player'], 'period')
+        trade_table.insert(3, 'player_team', trade_table['player'].map(player_teams))
+        tables['trade_relevances'] = trade_table
+    if optimal_lineups is not None:
+        tables['optimal_lineups'] = optimal_lineups.reset_index()
+        tables['optimal_lineups'].columns = ['team', 'day', 'player', 'slot', 'value']
+    return tables
+
+
+def write_tables(database_path: Union[str, Path], date: str, tables: Dict[str, pd.DataFrame]):
+    """Writes long-format tables into a SQLite database, replacing any rows for the same date.
+
+    All tables are replaced in a single transaction, so a failed write leaves the previous rows for
+    the date in place rather than a mix of old and new tables.
+
+    Args:
+        database_path (Union[str, Path]): path to the SQLite database (created if missing)
+        date (str): date the tables were computed for, in ISO format (e.g. '2021-03-28')
+        tables (Dict[str, pd.DataFrame]): tables to write, keyed by table name
+    """
+    Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit mode, so the transaction is only the explicit BEGIN/COMMIT below.
+    connection = sqlite3.connect(str(database_path), isolation_level=None)
+    try:
+        connection.execute('BEGIN')
+        try:
+            _write_tables(connection, date, tables)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+    finally:
+        connection.close()
+
+
+def _write_tables(connection: sqlite3.Connection, date: str, tables: Dict[str, pd.DataFrame]):
+    for name, table in tables.items():
+        table = table.assign(date=date)[['date'] + list(table.columns)]
+        schema = pd.io.sql.get_schema(table, name, con=connection)
+        connection.execute(schema.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+        connection.execute(f'DELETE FROM "{name}" WHERE date = ?', (date,))
+        columns = ', '.join(f'"{column}"' for column in table.columns)
+        placeholders = ', '.join('?' for _ in table.columns)
+        connection.executemany(
+            f'INSERT INTO "{name}" ({columns}) VALUES ({placeholders})',
+            table.astype(object).where(table.notna(), None).values.tolist(),
+        )
+        for columns in TABLE_INDEXES.get(name, []):
+            connection.execute(
+                f'CREATE INDEX IF NOT EXISTS "{name}_{"_".join(columns)}" '
+                f'ON "{name}" ({", ".join(columns)})'
+            )
+
+
+def query_store(
+    database_path: Union[str, Path], sql: str, params: Optional[Sequence[Any]] = None
+) -> pd.DataFrame:
+    """Runs a read-only SQL query against an exported statistics database.
+
+    Example:
+        query_store(
+            'data/statistics.db',
+            '''
+            SELECT s.player, s.value FROM normalized_player_statistics s
+            JOIN player_eligibility e ON e.date = s.date AND e.player = s.player AND e.slot = 'G'
+            WHERE s.date = ? AND s.period = 'Last 15 Day Stats' AND s.category = 'AST'
+            AND s.player NOT IN (SELECT player FROM team_rosters WHERE date = s.date)
+            ORDER BY s.value DESC LIMIT 10
+            ''',
+            params=('2021-03-28',),
+        )
+
+    Args:
+        database_path (Union[str, Path]): path to the SQLite database
+        sql (str): query to run
+        params (Optional[Sequence[Any]]): parameters to bind to the query. Defaults to None.
+
+    Returns:
+        pd.DataFrame: the query results
+    """
+    assert Path(database_path).exists(), f'Database must exist, checked {database_path}.'
+    connection = sqlite3.connect(f'file:{Path(database_path).as_posix()}?mode=ro', uri=True)
+    try:
+        return pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
@@ -25,3 +25,16 @@ def load_result(checkpoint_dir: Union[str, Path], date: str, name: str) -> Any:
         .read(location=Path(date, f'{name}.prefect').as_posix())
         .value
     )
+
+
+def write_result(checkpoint_dir: Union[str, Path], date: str, name: str, value: Any):
+    """Writes a result to file for the given date, so it can be loaded with `load_result`.
+
+    Args:
+        date (str): date to write the checkpoint for
+        name (str): name of the file (stem, e.g. 'p' if file name is 'p.prefect')
+        value (Any): value to write
+    """
+    LocalResult(
+        dir=Path(checkpoint_dir).as_posix(), location=Path(date, f'{name}.prefect').as_posix()
+    ).write(value)
@@ -1,15 +1,21 @@
+from .caching import checkpoint_names
 from .league import (
     League,
     get_league_mean_statistics,
     get_league_deviation_statistics,
     compute_team_roster_relevances,
     compute_trade_relevances,
+    fetch_league_payloads,
 )
+from .lineups import optimize_team_lineups
 from .players import (
     get_normalized_player_statistics,
+    get_player_eligibility,
     get_player_deviation_statistics,
     get_player_mean_statistics,
     parse_player_statistics,
 )
 from .rosters import get_team_rosters, get_normalized_roster_statistics, parse_roster_statistics
+from .store import export_statistics_database
 from .teams import get_teams
+from .transactions import RosterTransaction, apply_roster_transactions, update_statistics
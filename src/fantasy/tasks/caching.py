@@ -0,0 +1,207 @@
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import prefect
+from prefect.engine.result import Result
+from prefect.engine.results import LocalResult
+
+from ..version import __version__
+
+# Root of the `fantasy` package, whose sources are hashed into every cache key.
+_PACKAGE_DIR = Path(__file__).resolve().parents[1]
+
+# Fields of the league config that don't affect any computed result.
+_UNHASHED_LEAGUE_FIELDS = ('swid', 'espn_s2')
+
+# Names of the artifacts written by every `cached_task`, e.g. 'trade_relevances'.
+_CHECKPOINT_NAMES = set()
+
+
+def _update_hash(hasher: Any, value: Any):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hasher.update(repr(value.shape).encode())
+        if isinstance(value, pd.DataFrame):
+            hasher.update(repr(list(value.columns)).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        hasher.update(repr((value.shape, value.dtype.str)).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (dict, list, tuple)):
+        try:
+            hasher.update(json.dumps(value, sort_keys=True, default=repr).encode())
+        except TypeError:
+            # Mixed key types can't be sorted by json, so fall back to hashing item by item.
+            items = value
+            if isinstance(value, dict):
+                items = sorted(value.items(), key=lambda kv: repr(kv[0]))
+            hasher.update(f'{type(value).__name__}:{len(value)}'.encode())
+            for item in items:
+                _update_hash(hasher, item)
+    else:
+        hasher.update(repr(value).encode())
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint() -> str:
+    """Hashes the source of every module in the `fantasy` package.
+
+    Tasks mostly delegate to `League` methods and `analysis` helpers, so hashing the whole package
+    (rather than just the task functions) is what guarantees that any code change invalidates
+    checkpoints, without relying on `__version__` being bumped.
+
+    Returns:
+        str: hex digest of the package sources
+    """
+    hasher = hashlib.sha256()
+    for path in sorted(_PACKAGE_DIR.rglob('*.py')):
+        hasher.update(path.relative_to(_PACKAGE_DIR).as_posix().encode())
+        hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+def league_fingerprint(league: Any) -> Dict[str, Any]:
+    """Gets the parts of the league config that results depend on (i.e. excluding credentials).
+
+    Args:
+        league (League): league the flow is being run for
+
+    Returns:
+        Dict[str, Any]: league config fields to include in cache keys
+    """
+    if league is None:
+        return {}
+    return {
+        field.name: getattr(league, field.name)
+        for field in fields(league)
+        if field.name not in _UNHASHED_LEAGUE_FIELDS
+    }
+
+
+def compute_cache_key(name: str, inputs: Dict[str, Any], league: Any = None) -> str:
+    """Computes the cache key for a task from its inputs, the league config and the code version.
+
+    The code version is both the package version and a hash of the package sources (see
+    `source_fingerprint`), so same-day reruns after code edits recompute affected checkpoints.
+
+    Args:
+        name (str): name of the cached artifact (e.g. 'player_statistics')
+        inputs (Dict[str, Any]): inputs the task was called with
+        league (League): league the flow is being run for. Defaults to None.
+
+    Returns:
+        str: hex digest identifying this task run
+    """
+    hasher = hashlib.sha256()
+    _update_hash(hasher, (name, __version__, source_fingerprint()))
+    _update_hash(hasher, league_fingerprint(league))
+    for input_name in sorted(inputs):
+        hasher.update(input_name.encode())
+        _update_hash(hasher, inputs[input_name])
+    return hasher.hexdigest()
+
+
+class InputHashedLocalResult(LocalResult):
+    """Local result that is only considered to exist if it was written from identical inputs.
+
+    Alongside each checkpoint, a `.key` file records the cache key (see `compute_cache_key`) the
+    checkpoint was written with. When used as a task `target`, Prefect skips any task whose key
+    matches the one on disk and reads the checkpoint back instead.
+
+    Cache entries can be bypassed via `prefect.context`:
+        * `cache_force` (bool): recompute every task
+        * `cache_invalidate` (Iterable[str]): names of artifacts to recompute
+            (e.g. 'trade_relevances'), see `checkpoint_names`
+
+    Args:
+        input_names (Optional[Sequence[str]]): names of the task's arguments, the only inputs
+            hashed into the cache key. Defaults to None (no inputs).
+    """
+
+    def __init__(self, input_names: Optional[Sequence[str]] = None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.input_names = list(input_names or [])
+
+    @property
+    def name(self) -> str:
+        return Path(self.location).name.split('.')[0]
+
+    def _inputs(self, **kwargs: Any) -> Dict[str, Any]:
+        # Prefect passes the task's inputs mixed in with the context and every flow parameter.
+        return {name: kwargs[name] for name in self.input_names if name in kwargs}
+
+    def _key_path(self, location: str) -> str:
+        return os.path.join(self.dir, str(Path(location).with_suffix('.key')))
+
+    def exists(self, location: str, **kwargs: Any) -> bool:
+        invalidated = set(prefect.context.get('cache_invalidate', ()))
+        assert invalidated <= _CHECKPOINT_NAMES, (
+            f'Unknown artifacts to invalidate: {sorted(invalidated - _CHECKPOINT_NAMES)}, '
+            f'expected any of {checkpoint_names()}.'
+        )
+        if prefect.context.get('cache_force', False) or self.name in invalidated:
+            return False
+        if not super().exists(location, **kwargs):
+            return False
+        key_path = self._key_path(location.format(**kwargs))
+        if not os.path.exists(key_path):
+            return False
+        with open(key_path, 'r') as f:
+            stored_key = f.read().strip()
+        key = compute_cache_key(
+            self.name, self._inputs(**kwargs), league=prefect.context.get('league')
+        )
+        return stored_key == key
+
+    def write(self, value_: Any, **kwargs: Any) -> Result:
+        # Drop the old key first, so a crash mid-write can't pair the new value with old inputs.
+        key_path = self._key_path(self.location.format(**kwargs))
+        if os.path.exists(key_path):
+            os.remove(key_path)
+        new = super().write(value_, **kwargs)
+        key = compute_cache_key(
+            self.name, self._inputs(**kwargs), league=prefect.context.get('league')
+        )
+        with open(key_path, 'w') as f:
+            f.write(key)
+        return new
+
+
+def checkpoint_names() -> List[str]:
+    """Gets the names of the artifacts checkpointed by cached tasks (see `cache_invalidate`).
+
+    Returns:
+        List[str]: sorted artifact names
+    """
+    return sorted(_CHECKPOINT_NAMES)
+
+
+def cached_task(location: str, **task_kwargs: Any) -> Callable[[Callable], prefect.Task]:
+    """Decorates a function into a task whose checkpoint is read back on matching inputs.
+
+    Only the function's own arguments are hashed into the cache key, so flow parameters the task
+    doesn't take (e.g. `database_path`) don't invalidate it.
+
+    Args:
+        location (str): templated location of the checkpoint
+        **task_kwargs: further keyword arguments for `prefect.task` (e.g. `name`)
+
+    Returns:
+        Callable[[Callable], prefect.Task]: decorator building the task
+    """
+
+    def decorator(fn: Callable) -> prefect.Task:
+        result = InputHashedLocalResult(
+            input_names=list(inspect.signature(fn).parameters), location=location
+        )
+        _CHECKPOINT_NAMES.add(result.name)
+        return prefect.task(fn, result=result, target=location, checkpoint=True, **task_kwargs)
+
+    return decorator
@@ -1,19 +1,20 @@
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 import prefect
 import requests
-from tqdm import tqdm
 
-from prefect import task
-from prefect.engine.results import LocalResult
 
+from .caching import cached_task
 from .teams import Team
 from analysis import sigmoid
+from analysis.lineups import BENCH_SLOTS, ESPN_LINEUP_SLOTS
 
 
 @dataclass
@@ -24,6 +25,8 @@ class League:
     stats_map: Dict[str, str]
     stats_index_map: Dict[str, str]
     stats_agg_map: Dict[str, str]
+    lineup_slot_counts: Optional[Dict[str, int]] = None
+    lineup_category_weights: Optional[Dict[str, float]] = None
 
     def __post_init__(self):
         self.cookies = {"swid": self.swid, "espn_s2": self.espn_s2}
@@ -42,6 +45,71 @@ class League:
     def get_league_info(self, season: int) -> Dict:
         return requests.get(self.url(season=season), cookies=self.cookies).json()
 
+    @staticmethod
+    def _player_filter_headers() -> Dict[str, str]:
+        return {
+            'x-fantasy-filter': json.dumps(
+                {
+                    "players": {
+                        "limit": 1500,
+                        "sortDraftRanks": {
+                            "sortPriority": 100,
+                            "sortAsc": True,
+                            "value": "STANDARD",
+                        },
+                    }
+                }
+            )
+        }
+
+    def _payload_requests(self, season: int) -> Dict[str, Dict]:
+        return {
+            'league': {'url': self.url(season=season)},
+            'rosters': {'url': self.url(season=season, views=['mRoster'])},
+            'players': {
+                'url': self.url(season=season, views=['kona_player_info']),
+                'headers': self._player_filter_headers(),
+            },
+        }
+
+    async def _fetch_payloads(self, season: int) -> Dict[str, Dict]:
+        payload_requests = self._payload_requests(season=season)
+        loop = asyncio.get_event_loop()
+        with requests.Session() as session, ThreadPoolExecutor(
+            max_workers=len(payload_requests)
+        ) as executor:
+            session.cookies.update(self.cookies)
+            session.mount(
+                'http://', requests.adapters.HTTPAdapter(pool_maxsize=len(payload_requests))
+            )
+            responses = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor, lambda kwargs=kwargs: session.get(**kwargs).json()
+                    )
+                    for kwargs in payload_requests.values()
+                )
+            )
+        return dict(zip(payload_requests.keys(), responses))
+
+    def fetch_payloads(self, season: int) -> Dict[str, Dict]:
+        """Fetches the league, roster and player payloads from ESPN's fantasy API concurrently.
+
+        All three requests share a single session (and so a single connection pool), so the total
+        fetch time is roughly that of the slowest request.
+
+        Args:
+            season (int): season to fetch payloads for
+
+        Returns:
+            Dict[str, Dict]: decoded JSON payloads keyed by 'league', 'rosters' and 'players'
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self._fetch_payloads(season=season))
+        finally:
+            loop.close()
+
     def _make_readable_stats(
         self,
         stats: Dict[str, Dict[str, float]],
@@ -84,25 +152,18 @@ class League:
             }
         )
 
-    def get_player_statistics(self, season: int) -> pd.DataFrame:
-        player_request_info = requests.get(
+    def _get_player_request_info(self, season: int) -> Dict:
+        return requests.get(
             self.url(season=season, views=['kona_player_info']),
             cookies=self.cookies,
-            headers={
-                'x-fantasy-filter': json.dumps(
-                    {
-                        "players": {
-                            "limit": 1500,
-                            "sortDraftRanks": {
-                                "sortPriority": 100,
-                                "sortAsc": True,
-                                "value": "STANDARD",
-                            },
-                        }
-                    }
-                )
-            },
+            headers=self._player_filter_headers(),
         ).json()
+
+    def get_player_statistics(
+        self, season: int, player_request_info: Optional[Dict] = None
+    ) -> pd.DataFrame:
+        if player_request_info is None:
+            player_request_info = self._get_player_request_info(season=season)
         return pd.concat(
             {
                 player_info['player']['fullName']: self._parse_player_stats(
@@ -113,6 +174,21 @@ class League:
             axis=0,
         ).sort_index(level=0)
 
+    def get_player_eligibility(
+        self, season: int, player_request_info: Optional[Dict] = None
+    ) -> Dict[str, List[str]]:
+        if player_request_info is None:
+            player_request_info = self._get_player_request_info(season=season)
+        return {
+            player_info['player']['fullName']: [
+                ESPN_LINEUP_SLOTS[slot_id]
+                for slot_id in player_info['player'].get('eligibleSlots', [])
+                if slot_id in ESPN_LINEUP_SLOTS
+                and ESPN_LINEUP_SLOTS[slot_id] not in BENCH_SLOTS
+            ]
+            for player_info in player_request_info['players']
+        }
+
     def _get_per_roster_stats(self, player_info: pd.DataFrame, roster: List[str]) -> pd.DataFrame:
         roster_stats = (
             player_info.loc[roster]
@@ -123,11 +199,14 @@ class League:
             roster_stats = roster_stats.unstack(level=1)
         return roster_stats
 
-    def get_team_rosters(self, season: int, teams: List[Team]) -> Dict[str, List[str]]:
-        roster_info = requests.get(
-            self.url(season=season, views=['mRoster']),
-            cookies=self.cookies,
-        ).json()
+    def get_team_rosters(
+        self, season: int, teams: List[Team], roster_info: Optional[Dict] = None
+    ) -> Dict[str, List[str]]:
+        if roster_info is None:
+            roster_info = requests.get(
+                self.url(season=season, views=['mRoster']),
+                cookies=self.cookies,
+            ).json()
         rosters = {
             teams[team['id'] - 1].abbrev: [
                 entry['playerPoolEntry']['player']['fullName']
@@ -191,12 +270,44 @@ class League:
         return cls(**league_config)
 
 
-@task(
+def _relevance_inputs(
+    team_rosters: Dict[str, List[str]],
+    player_stats: pd.DataFrame,
+    roster_stats: pd.DataFrame,
+) -> Tuple[List[str], pd.Index, np.ndarray, np.ndarray, List[np.ndarray]]:
+    # Same layout as `League.get_relevance_scores`, but as arrays indexed by player and team.
+    team_names = list(team_rosters.keys())
+    players = player_stats.swaplevel().index.get_level_values(level=0).unique()
+    player_sigmoids = sigmoid(player_stats.swaplevel().values).reshape((len(players), -1, 4))
+    team_sigmoids = np.stack(
+        [sigmoid(roster_stats.loc[:, team].unstack().T.values) for team in team_names]
+    )
+    roster_indices = [players.get_indexer(team_rosters[team]) for team in team_names]
+    for team, indices in zip(team_names, roster_indices):
+        assert (indices >= 0).all(), f'All players on {team} must have statistics.'
+    return team_names, players, player_sigmoids, team_sigmoids, roster_indices
+
+
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/league_payloads.prefect",
+    name='Fetch League Payloads',
+)
+def fetch_league_payloads(season: int) -> Dict[str, Dict]:
+    """Fetches the league, roster and player payloads from ESPN's fantasy API concurrently.
+
+    Args:
+        season (int): season to fetch payloads for
+
+    Returns:
+        Dict[str, Dict]: decoded JSON payloads keyed by 'league', 'rosters' and 'players', to be
+            handed to `get_teams`, `get_team_rosters` and `parse_player_statistics`
+    """
+    return prefect.context.league.fetch_payloads(season=season)
+
+
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/league_mean_statistics.prefect",
     name='Get League Mean Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/league_mean_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def get_league_mean_statistics(team_stats: pd.DataFrame) -> pd.DataFrame:
     """Aggregates team aggregated statistics over the whole league.
@@ -216,12 +327,9 @@ def get_league_mean_statistics(team_stats: pd.DataFrame) -> pd.DataFrame:
     return team_stats.groupby(level=1).apply(lambda df: df.mean(axis=0))
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/league_deviation_statistics.prefect",
     name='Get League deviation Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/league_deviation_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def get_league_deviation_statistics(team_stats: pd.DataFrame) -> pd.DataFrame:
     """Aggregates team aggregated statistics over the whole league.
@@ -241,54 +349,81 @@ def get_league_deviation_statistics(team_stats: pd.DataFrame) -> pd.DataFrame:
     return team_stats.groupby(level=1).apply(lambda df: df.std(axis=0))
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/team_roster_relevances.prefect",
     name='Compute All Roster Relevances',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/team_roster_relevances.prefect"
-    ),
-    checkpoint=True,
 )
 def compute_team_roster_relevances(
     team_rosters: Dict[str, List[str]],
     player_stats: pd.DataFrame,
     roster_stats: pd.DataFrame,
 ):
+    team_names, players, player_sigmoids, team_sigmoids, roster_indices = _relevance_inputs(
+        team_rosters, player_stats, roster_stats
+    )
+    # Only each team's own players are scored, rather than the whole player pool.
     return pd.concat(
         {
-            team: prefect.context.league.get_team_relevance_scores(
-                team_rosters, player_stats, roster_stats, team
+            team: pd.DataFrame(
+                data=(player_sigmoids[roster_indices[i]] - team_sigmoids[i]).sum(axis=1),
+                index=pd.Index(team_rosters[team], name=players.name),
+                columns=player_stats.columns,
             )
-            for team in tqdm(team_rosters, desc='Computing Team Roster Relevances', leave=False)
+            for i, team in enumerate(team_names)
         }
     )
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/trade_relevances.prefect",
     name='Compute All Trade Relevances',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/trade_relevances.prefect"
-    ),
-    checkpoint=True,
 )
 def compute_trade_relevances(
     team_rosters: Dict[str, List[str]],
     player_stats: pd.DataFrame,
     roster_stats: pd.DataFrame,
+    teams: Optional[List[str]] = None,
 ) -> pd.DataFrame:
-    team_names = list(team_rosters.keys())
-    all_trade_scores = {}
-    for i in tqdm(range(len(team_names)), desc='Computing Trade Relevances', leave=False):
-        my_team_stats = roster_stats.loc[:, team_names[i]].unstack().T
-        for j in range(i + 1, len(team_names)):
-            their_team_stats = roster_stats.loc[:, team_names[j]].unstack().T
-            all_trade_scores[(team_names[i], team_names[j])] = pd.concat(
-                [
-                    prefect.context.league.get_relevance_scores(player_stats, my_team_stats).loc[
-                        team_rosters[team_names[j]]
-                    ],
-                    prefect.context.league.get_relevance_scores(player_stats, their_team_stats).loc[
-                        team_rosters[team_names[i]]
-                    ],
-                ]
+    """Computes relevance scores of every team's players to every other team.
+
+    Each pair only scores the two rosters involved, rather than the whole player pool.
+
+    Args:
+        team_rosters (Dict[str, List[str]]): mapping from roster name to roster (list of player
+            names)
+        player_stats (pd.DataFrame): normalized player statistics
+        roster_stats (pd.DataFrame): normalized roster statistics
+        teams (Optional[List[str]]): if given, only pairs involving at least one of these teams are
+            computed. Defaults to None (all pairs).
+
+    Returns:
+        pd.DataFrame: relevance scores indexed by (team, other team, player), where the players of
+            each team are scored against the other team's statistics
+    """
+    team_names, players, player_sigmoids, team_sigmoids, roster_indices = _relevance_inputs(
+        team_rosters, player_stats, roster_stats
+    )
+    pairs = [
+        (i, j)
+        for i in range(len(team_names))
+        for j in range(i + 1, len(team_names))
+        if teams is None or team_names[i] in teams or team_names[j] in teams
+    ]
+    return pd.concat(
+        {
+            (team_names[i], team_names[j]): pd.DataFrame(
+                # Team j's players scored against team i, then team i's players against team j.
+                data=np.concatenate(
+                    [
+                        (player_sigmoids[roster_indices[j]] - team_sigmoids[i]).sum(axis=1),
+                        (player_sigmoids[roster_indices[i]] - team_sigmoids[j]).sum(axis=1),
+                    ]
+                ),
+                index=pd.Index(
+                    team_rosters[team_names[j]] + team_rosters[team_names[i]], name=players.name
+                ),
+                columns=player_stats.columns,
             )
-    return pd.concat(all_trade_scores)
+            for i, j in pairs
+        }
+    )
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import prefect
+
+from .caching import cached_task
+from analysis.lineups import (
+    DEFAULT_LINEUP_CATEGORY_WEIGHTS,
+    DEFAULT_LINEUP_SLOT_COUNTS,
+    expand_lineup_slots,
+    optimize_lineups,
+)
+
+
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/optimal_lineups.prefect",
+    name='Optimize Team Lineups',
+)
+def optimize_team_lineups(
+    team_rosters: Dict[str, List[str]],
+    player_eligibility: Dict[str, List[str]],
+    player_stats: pd.DataFrame,
+    games: Optional[pd.DataFrame] = None,
+    period: Optional[str] = None,
+) -> pd.DataFrame:
+    """Chooses the starting lineup maximizing total normalized category value for every team.
+
+    A player's value is the weighted sum of their z-scores over the league's scoring categories
+    (`League.lineup_category_weights`, defaulting to 9-category scoring with TO negated). All
+    teams and days are solved in one batched call to `optimize_lineups`.
+
+    Args:
+        team_rosters (Dict[str, List[str]]): mapping from roster name to roster (list of player
+            names)
+        player_eligibility (Dict[str, List[str]]): mapping from player name to eligible slot names
+        player_stats (pd.DataFrame): normalized player statistics, indexed by (category, player)
+        games (Optional[pd.DataFrame]): boolean dataframe indexed by player name, with one column
+            per day, marking whether a player has a game that day. If not given, every player is
+            treated as available for a single day, i.e. the schedule is ignored.
+        period (Optional[str]): the statistics period to value players by (e.g. 'Last 7 Day Stats').
+            If not given, the mean over all periods is used.
+
+    Returns:
+        pd.DataFrame: dataframe indexed by (team, day, player) with the assigned slot ('BE' if
+            benched) and the player's value
+    """
+    slot_counts = prefect.context.league.lineup_slot_counts or DEFAULT_LINEUP_SLOT_COUNTS
+    slots = expand_lineup_slots(slot_counts)
+    category_weights = pd.Series(
+        prefect.context.league.lineup_category_weights or DEFAULT_LINEUP_CATEGORY_WEIGHTS
+    )
+    player_values = (
+        player_stats.mul(
+            category_weights.reindex(player_stats.index.get_level_values(level=0))
+            .fillna(0)
+            .values,
+            axis=0,
+        )
+        .groupby(level=1)
+        .sum()
+    )
+    player_values = player_values[period] if period else player_values.mean(axis=1)
+    if games is None:
+        games = pd.DataFrame({0: True}, index=player_values.index)
+    days = list(games.columns)
+
+    team_names = list(team_rosters.keys())
+    num_players = max(len(roster) for roster in team_rosters.values())
+    values = np.full((len(team_names), len(days), num_players), np.nan)
+    eligibility = np.zeros((len(team_names), len(days), num_players, len(slots)), dtype=bool)
+    for i, team in enumerate(team_names):
+        roster = team_rosters[team]
+        playing = games.reindex(roster).fillna(False).values.astype(bool).T
+        values[i, :, : len(roster)] = np.where(
+            playing, player_values.reindex(roster).fillna(0).values, np.nan
+        )
+        eligibility[i, :, : len(roster)] = np.array(
+            [[slot in player_eligibility.get(player, []) for slot in slots] for player in roster]
+        ).reshape((len(roster), len(slots)))
+
+    assignments, _ = optimize_lineups(values, eligibility)
+    index, records = [], []
+    for i, team in enumerate(team_names):
+        for j, day in enumerate(days):
+            for k, player in enumerate(team_rosters[team]):
+                slot = assignments[i, j, k]
+                index.append((team, day, player))
+                records.append(
+                    {'slot': slots[slot] if slot >= 0 else 'BE', 'value': values[i, j, k]}
+                )
+    return pd.DataFrame(
+        records, index=pd.MultiIndex.from_tuples(index, names=['team', 'day', 'player'])
+    )
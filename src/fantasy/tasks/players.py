@@ -1,26 +1,26 @@
 import numpy as np
 import pandas as pd
-from typing import List
+from typing import Dict, List, Optional
 
 import prefect
-from prefect import task
-from prefect.engine.results import LocalResult
 
+from .caching import cached_task
 from .teams import Team
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_statistics.prefect",
     name='Parse Player Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_statistics.prefect"
-    ),
-    checkpoint=True,
 )
-def parse_player_statistics(season: int) -> pd.DataFrame:
+def parse_player_statistics(
+    season: int, payloads: Optional[Dict[str, Dict]] = None
+) -> pd.DataFrame:
     """Parses player statistics from a request sent to ESPN's fantasy API.
 
     Args:
         season (int): season to parse player statistics for
+        payloads (Optional[Dict[str, Dict]]): prefetched payloads from `fetch_league_payloads`.
+            If not given, the player endpoint is requested directly.
 
     Returns:
         pd.DataFrame: multi-indexed dataframe containing player statistics over
@@ -30,15 +30,38 @@ def parse_player_statistics(season: int) -> pd.DataFrame:
             * current year statistics
             all indexed by according names
     """
-    return prefect.context.league.get_player_statistics(season=season)
+    return prefect.context.league.get_player_statistics(
+        season=season,
+        player_request_info=payloads['players'] if payloads is not None else None,
+    )
+
+
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_eligibility.prefect",
+    name='Get Player Eligibility',
+)
+def get_player_eligibility(
+    season: int, payloads: Optional[Dict[str, Dict]] = None
+) -> Dict[str, List[str]]:
+    """Gets the starting lineup slots each player is eligible for from ESPN's fantasy API.
+
+    Args:
+        season (int): season to get player eligibility for
+        payloads (Optional[Dict[str, Dict]]): prefetched payloads from `fetch_league_payloads`.
+            If not given, the player endpoint is requested directly.
+
+    Returns:
+        Dict[str, List[str]]: mapping from player name to eligible slot names (e.g. 'PG', 'G', 'UT')
+    """
+    return prefect.context.league.get_player_eligibility(
+        season=season,
+        player_request_info=payloads['players'] if payloads is not None else None,
+    )
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_mean_statistics.prefect",
     name='Get Player Mean Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_mean_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def get_player_mean_statistics(player_stats: pd.DataFrame) -> pd.DataFrame:
     """Aggregates team aggregated statistics over the whole player.
@@ -60,12 +83,9 @@ def get_player_mean_statistics(player_stats: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_deviation_statistics.prefect",
     name='Get Player Deviation Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/player_deviation_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def get_player_deviation_statistics(player_stats: pd.DataFrame) -> pd.DataFrame:
     """Aggregates team aggregated statistics over the whole player.
@@ -87,12 +107,9 @@ def get_player_deviation_statistics(player_stats: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/normalized_player_statistics.prefect",
     name='Get Normalized Player Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/normalized_player_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def get_normalized_player_statistics(
     teams: List[Team],
@@ -1,41 +1,42 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 import pandas as pd
 
 import prefect
-from prefect import task
-from prefect.engine.results import LocalResult
 
+from .caching import cached_task
 from .teams import Team
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/team_rosters.prefect",
     name='Get Team Rosters',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/team_rosters.prefect"
-    ),
-    checkpoint=True,
 )
-def get_team_rosters(season: int, teams: List[Team]) -> Dict[str, List[str]]:
+def get_team_rosters(
+    season: int, teams: List[Team], payloads: Optional[Dict[str, Dict]] = None
+) -> Dict[str, List[str]]:
     """Gets rosters for each team using ESPN's fantasy API.
 
     Args:
         season (int): the season to get roster statistics for
         teams (List[Team]): the teams in the league to consider
+        payloads (Optional[Dict[str, Dict]]): prefetched payloads from `fetch_league_payloads`.
+            If not given, the roster endpoint is requested directly.
 
     Returns:
         Dict[str, List[str]]: mapping from roster name to roster (list of player names)
     """
-    return prefect.context.league.get_team_rosters(season=season, teams=teams)
+    return prefect.context.league.get_team_rosters(
+        season=season,
+        teams=teams,
+        roster_info=payloads['rosters'] if payloads is not None else None,
+    )
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/roster_statistics.prefect",
     name='Parse Roster Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/roster_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def parse_roster_statistics(
     season: int, rosters: Dict[str, List[str]], player_info: pd.DataFrame
@@ -58,12 +59,9 @@ def parse_roster_statistics(
     return prefect.context.league.get_roster_statistics(rosters=rosters, player_info=player_info)
 
 
-@task(
+@cached_task(
+    "{output_directory}/{date:%m}-{date:%d}-{date:%Y}/normalized_roster_statistics.prefect",
     name='Get Normalized Roster Statistics',
-    result=LocalResult(
-        location="{output_directory}/{date:%m}-{date:%d}-{date:%Y}/normalized_roster_statistics.prefect"
-    ),
-    checkpoint=True,
 )
 def get_normalized_roster_statistics(
     teams: List[Team],
@@ -0,0 +1,56 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+import prefect
+from prefect import task
+
+from analysis.store import to_long_tables, write_tables
+
+
+@task(name='Export Statistics Database')
+def export_statistics_database(
+    database_path: Optional[Union[str, Path]],
+    player_statistics: pd.DataFrame,
+    normalized_player_statistics: pd.DataFrame,
+    player_eligibility: Dict[str, List[str]],
+    roster_statistics: pd.DataFrame,
+    normalized_roster_statistics: pd.DataFrame,
+    team_rosters: Dict[str, List[str]],
+    team_roster_relevances: pd.DataFrame,
+    trade_relevances: pd.DataFrame,
+    optimal_lineups: pd.DataFrame,
+):
+    """Exports all artifacts for the run date as indexed long-format tables into a SQLite database.
+
+    Args:
+        database_path (Optional[Union[str, Path]]): path to the SQLite database. If not given,
+            nothing is exported.
+        player_statistics (pd.DataFrame): statistics for all players
+        normalized_player_statistics (pd.DataFrame): z-scores for all players
+        player_eligibility (Dict[str, List[str]]): mapping from player name to eligible slots
+        roster_statistics (pd.DataFrame): statistics for all rosters
+        normalized_roster_statistics (pd.DataFrame): z-scores for all rosters
+        team_rosters (Dict[str, List[str]]): mapping from roster name to roster
+        team_roster_relevances (pd.DataFrame): relevances of each roster's players
+        trade_relevances (pd.DataFrame): relevances of players between each pair of rosters
+        optimal_lineups (pd.DataFrame): optimal starting lineups for each roster
+    """
+    if database_path is None:
+        return
+    write_tables(
+        database_path,
+        date=prefect.context.date.strftime('%Y-%m-%d'),
+        tables=to_long_tables(
+            player_statistics=player_statistics,
+            normalized_player_statistics=normalized_player_statistics,
+            player_eligibility=player_eligibility,
+            roster_statistics=roster_statistics,
+            normalized_roster_statistics=normalized_roster_statistics,
+            team_rosters=team_rosters,
+            team_roster_relevances=team_roster_relevances,
+            trade_relevances=trade_relevances,
+            optimal_lineups=optimal_lineups,
+        ),
+    )
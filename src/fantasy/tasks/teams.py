@@ -1,9 +1,9 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional
 
 import prefect
-from prefect import task
-from prefect.engine.results import LocalResult
+
+from .caching import cached_task
 
 
 @dataclass(frozen=True)
@@ -21,11 +21,10 @@ class Team:
         return hash(repr(self))
 
 
-@task(
-    name='Retrieve Fantasy Teams',
-    result=LocalResult(location="{output_directory}/{date:%Y}/teams.prefect"),
-    checkpoint=True,
-)
-def get_teams(season: int) -> List[Team]:
-    league_info = prefect.context.league.get_league_info(season=season)
+@cached_task("{output_directory}/{date:%Y}/teams.prefect", name='Retrieve Fantasy Teams')
+def get_teams(season: int, payloads: Optional[Dict[str, Dict]] = None) -> List[Team]:
+    if payloads is not None:
+        league_info = payloads['league']
+    else:
+        league_info = prefect.context.league.get_league_info(season=season)
     return [Team(**team_info) for team_info in league_info['teams']]
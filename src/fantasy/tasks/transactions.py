@@ -0,0 +1,280 @@
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import prefect
+
+from .league import (
+    League,
+    compute_team_roster_relevances,
+    compute_trade_relevances,
+    get_league_deviation_statistics,
+    get_league_mean_statistics,
+)
+from .lineups import optimize_team_lineups
+from .rosters import get_normalized_roster_statistics
+from .store import export_statistics_database
+from analysis import load_result, write_result
+
+
+# Artifacts written by `write_all_statistics` for each date, carried over or refreshed here.
+_ARTIFACT_NAMES = [
+    'team_rosters',
+    'player_statistics',
+    'player_mean_statistics',
+    'player_deviation_statistics',
+    'normalized_player_statistics',
+    'roster_statistics',
+    'league_mean_statistics',
+    'league_deviation_statistics',
+    'normalized_roster_statistics',
+    'team_roster_relevances',
+    'trade_relevances',
+]
+# Artifacts that older artifact sets may not have.
+_LINEUP_ARTIFACT_NAMES = ['player_eligibility', 'optimal_lineups']
+
+
+@dataclass
+class RosterTransaction:
+    team: str
+    added: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+
+def apply_roster_transactions(
+    team_rosters: Dict[str, List[str]], transactions: List[RosterTransaction]
+) -> Tuple[Dict[str, List[str]], Set[str]]:
+    """Applies add/drop transactions to team rosters.
+
+    Within a transaction, players are dropped before they're added, and an added player must not
+    be on any roster at that point. A trade is therefore expressed as the transactions dropping
+    the traded players, followed by the ones adding them.
+
+    Args:
+        team_rosters (Dict[str, List[str]]): mapping from roster name to roster (list of player
+            names)
+        transactions (List[RosterTransaction]): transactions to apply, in order
+
+    Returns:
+        Tuple[Dict[str, List[str]], Set[str]]: the updated rosters and the teams whose rosters
+            changed
+    """
+    new_rosters = {team: list(roster) for team, roster in team_rosters.items()}
+    affected_teams = set()
+    for transaction in transactions:
+        assert transaction.team in new_rosters, f'Unknown team {transaction.team}.'
+        roster = new_rosters[transaction.team]
+        for player in transaction.dropped:
+            assert player in roster, f'{player} is not on {transaction.team}.'
+            roster.remove(player)
+        for player in transaction.added:
+            owners = [team for team, other in new_rosters.items() if player in other]
+            assert not owners, f'{player} is already on {owners[0]}.'
+            roster.append(player)
+        affected_teams.add(transaction.team)
+    return new_rosters, affected_teams
+
+
+def _merge_trade_relevances(
+    team_names: List[str], previous: pd.DataFrame, updated: pd.DataFrame
+) -> pd.DataFrame:
+    updated_pairs = set(updated.index.droplevel(level=2))
+    return pd.concat(
+        {
+            (team_names[i], team_names[j]): (
+                updated if (team_names[i], team_names[j]) in updated_pairs else previous
+            ).loc[(team_names[i], team_names[j])]
+            for i in range(len(team_names))
+            for j in range(i + 1, len(team_names))
+        }
+    )
+
+
+def _update_artifacts(
+    league: League,
+    artifacts: Dict[str, Any],
+    team_rosters: Dict[str, List[str]],
+    affected_teams: Set[str],
+    tolerance: float,
+) -> Dict[str, Any]:
+    team_names = list(team_rosters.keys())
+    affected_roster_statistics = league.get_roster_statistics(
+        rosters={team: team_rosters[team] for team in affected_teams},
+        player_info=artifacts['player_statistics'],
+    )
+    roster_statistics = pd.concat(
+        {
+            team: (
+                affected_roster_statistics
+                if team in affected_teams
+                else artifacts['roster_statistics']
+            ).loc[team]
+            for team in team_names
+        },
+        axis=0,
+    )
+    league_mean_statistics = get_league_mean_statistics.run(roster_statistics)
+    league_deviation_statistics = get_league_deviation_statistics.run(roster_statistics)
+    normalized_roster_statistics = get_normalized_roster_statistics.run(
+        teams=team_names,
+        roster_statistics=roster_statistics,
+        league_mean_statistics=league_mean_statistics,
+        league_deviation_statistics=league_deviation_statistics,
+    )
+    shifts = (
+        (normalized_roster_statistics - artifacts['normalized_roster_statistics'])
+        .abs()
+        .max(axis=0)
+    )
+    changed_teams = affected_teams | {
+        team
+        for team in team_names
+        if not np.isfinite(shifts[team]) or shifts[team] > tolerance
+    }
+
+    changed_team_roster_relevances = compute_team_roster_relevances.run(
+        team_rosters={team: team_rosters[team] for team in team_names if team in changed_teams},
+        player_stats=artifacts['normalized_player_statistics'],
+        roster_stats=normalized_roster_statistics,
+    )
+    updated = dict(
+        team_rosters=team_rosters,
+        roster_statistics=roster_statistics,
+        league_mean_statistics=league_mean_statistics,
+        league_deviation_statistics=league_deviation_statistics,
+        normalized_roster_statistics=normalized_roster_statistics,
+        team_roster_relevances=pd.concat(
+            {
+                team: (
+                    changed_team_roster_relevances
+                    if team in changed_teams
+                    else artifacts['team_roster_relevances']
+                ).loc[team]
+                for team in team_names
+            }
+        ),
+        trade_relevances=_merge_trade_relevances(
+            team_names,
+            artifacts['trade_relevances'],
+            compute_trade_relevances.run(
+                team_rosters=team_rosters,
+                player_stats=artifacts['normalized_player_statistics'],
+                roster_stats=normalized_roster_statistics,
+                teams=list(changed_teams),
+            ),
+        ),
+    )
+
+    if 'optimal_lineups' in artifacts and 'player_eligibility' in artifacts:
+        # Lineups only depend on a team's own roster, so only teams with transactions change.
+        affected_lineups = optimize_team_lineups.run(
+            team_rosters={team: team_rosters[team] for team in affected_teams},
+            player_eligibility=artifacts['player_eligibility'],
+            player_stats=artifacts['normalized_player_statistics'],
+        )
+        updated['optimal_lineups'] = pd.concat(
+            {
+                team: (
+                    affected_lineups if team in affected_teams else artifacts['optimal_lineups']
+                ).loc[team]
+                for team in team_names
+            },
+            names=['team'],
+        )
+    return updated
+
+
+def _write_artifact_set(checkpoint_dir: Union[str, Path], date: str, artifacts: Dict[str, Any]):
+    # The set is staged in a temporary directory and swapped in whole, so the directory for `date`
+    # (possibly the set just loaded) is never left half-written, and none of its cache keys remain.
+    staging_directory = Path(tempfile.mkdtemp(prefix=f'.{date}-', dir=checkpoint_dir))
+    try:
+        for name, value in artifacts.items():
+            write_result(checkpoint_dir, staging_directory.name, name, value)
+    except BaseException:
+        shutil.rmtree(staging_directory)
+        raise
+    output_directory = Path(checkpoint_dir, date)
+    previous_directory = staging_directory.with_name(f'{staging_directory.name}-previous')
+    if output_directory.exists():
+        output_directory.rename(previous_directory)
+    staging_directory.rename(output_directory)
+    if previous_directory.exists():
+        shutil.rmtree(previous_directory)
+
+
+def update_statistics(
+    league: League,
+    checkpoint_dir: Union[str, Path],
+    date: str,
+    transactions: List[RosterTransaction],
+    output_date: Optional[datetime] = None,
+    tolerance: float = 0.0,
+    database_path: Optional[Union[str, Path]] = None,
+) -> Dict[str, Any]:
+    """Incrementally recomputes a dated artifact set after roster transactions.
+
+    Only the roster statistics of teams with transactions are re-aggregated. The league
+    mean/deviation and normalized roster statistics are then refreshed, and relevances are only
+    recomputed for teams whose roster or normalized roster statistics changed (trade relevances
+    for every pair involving such a team). Everything else is carried over from `date`, so
+    without any transactions the artifact set is copied as is.
+
+    The new artifact set replaces the whole directory for `output_date`, which may be `date`
+    itself (e.g. for a transaction made the same day as the nightly run). It is written without
+    cache keys, so a later `write_all_statistics` run for that date recomputes these artifacts
+    rather than treating them as cache hits.
+
+    Args:
+        league (League): league the artifacts were computed for
+        checkpoint_dir (Union[str, Path]): directory holding the dated artifacts
+        date (str): date of the artifact set to update (e.g. '03-28-2021')
+        transactions (List[RosterTransaction]): transactions made since `date`
+        output_date (Optional[datetime]): date to write the new artifact set for. Defaults to now.
+        tolerance (float): normalized roster statistics of teams without transactions always shift
+            with the league mean/deviation; teams whose statistics move by no more than this keep
+            their previous relevances. Defaults to 0.0 (exact).
+        database_path (Optional[Union[str, Path]]): if given, the new artifact set is also
+            exported to this SQLite database. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: the new artifact set, keyed by artifact name
+    """
+    output_date = output_date or datetime.now()
+    output_date_directory = f'{output_date:%m}-{output_date:%d}-{output_date:%Y}'
+    artifacts = {name: load_result(checkpoint_dir, date, name) for name in _ARTIFACT_NAMES}
+    for name in _LINEUP_ARTIFACT_NAMES:
+        if Path(checkpoint_dir, date, f'{name}.prefect').exists():
+            artifacts[name] = load_result(checkpoint_dir, date, name)
+
+    team_rosters, affected_teams = apply_roster_transactions(
+        artifacts['team_rosters'], transactions
+    )
+    output_directory = Path(checkpoint_dir).absolute().as_posix()
+    with prefect.context(league=league, output_directory=output_directory, date=output_date):
+        if affected_teams:
+            artifacts.update(
+                _update_artifacts(league, artifacts, team_rosters, affected_teams, tolerance)
+            )
+        _write_artifact_set(checkpoint_dir, output_date_directory, artifacts)
+        if database_path is not None:
+            export_statistics_database.run(
+                database_path=database_path,
+                player_statistics=artifacts['player_statistics'],
+                normalized_player_statistics=artifacts['normalized_player_statistics'],
+                player_eligibility=artifacts.get('player_eligibility', {}),
+                roster_statistics=artifacts['roster_statistics'],
+                normalized_roster_statistics=artifacts['normalized_roster_statistics'],
+                team_rosters=artifacts['team_rosters'],
+                team_roster_relevances=artifacts['team_roster_relevances'],
+                trade_relevances=artifacts['trade_relevances'],
+                optimal_lineups=artifacts.get('optimal_lineups'),
+            )
+    return artifacts